@@ -26,44 +26,69 @@ Optional:
 from __future__ import annotations
 import argparse
 import csv
+import os
 import re
+import sys
 from dataclasses import dataclass
-from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 # ------------------------- helpers -------------------------
 
+_nonalnum_re = re.compile(r"[^a-z0-9]+")
+_year_re = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_serial_re = re.compile(r"/\s*(\d{1,4})\b")
+_auto_re = re.compile(r"\b(auto|autograph)\b", re.I)
+_sku_nonalnum_re = re.compile(r"[^0-9A-Za-z]+")
+_lead_year_re = re.compile(r"^(19\d{2}|20\d{2})\s+")
+# ASCII bytes that are not [0-9A-Za-z], for bytes.translate(None, delete)
+_SKU_DROP = bytes(b for b in range(128) if not chr(b).isalnum())
+
 def clean(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip())
+    # str.split() with no args splits on the same Unicode whitespace as \s+
+    return " ".join((s or "").split())
 
 def slug(s: str) -> str:
     s = (s or "").lower()
-    s = re.sub(r"[^a-z0-9]+", "_", s).strip("_")
+    s = _nonalnum_re.sub("_", s).strip("_")
     return s or "x"
 
+def alnum_only(s: str) -> str:
+    s = s or ""
+    if s.isascii():
+        # card numbers are nearly always ASCII: a byte-level delete beats the regex ~2x
+        return s.encode("ascii").translate(None, _SKU_DROP).decode("ascii")
+    return _sku_nonalnum_re.sub("", s)
+
 def infer_year(text: str) -> str:
     t = text or ""
-    m = re.search(r"\b(19\d{2}|20\d{2})\b", t)
+    m = _year_re.search(t)
     return m.group(1) if m else ""
 
 def infer_serial(*texts: str) -> str:
     for t in texts:
         if not t:
             continue
-        m = re.search(r"/\s*(\d{1,4})\b", t)
+        m = _serial_re.search(t)
         if m:
             return m.group(1)
     return ""
 
-def infer_auto(*texts: str) -> str:
-    t = " ".join([x for x in texts if x])
-    return "Yes" if re.search(r"\b(auto|autograph)\b", t, re.I) else "No"
+def infer_auto(*texts: str) -> bool:
+    # search each text on its own: no joined copy, and stops at the first hit
+    for t in texts:
+        if t and _auto_re.search(t):
+            return True
+    return False
 
 def safe_float(s: str) -> Optional[float]:
+    # blank cells are the common case; don't pay for a raised exception on each one
+    if not s:
+        return None
     try:
-        return float(str(s).strip())
-    except Exception:
+        return float(s)  # float() already ignores surrounding whitespace
+    except ValueError:
         return None
 
 def psych_price(x: float) -> float:
@@ -74,7 +99,7 @@ def psych_price(x: float) -> float:
 
 # ------------------------- data model -------------------------
 
-@dataclass
+@dataclass(slots=True)  # no per-instance __dict__; one Card per inventory row
 class Card:
     card_name: str
     player: str
@@ -92,14 +117,11 @@ class Card:
     year: str = ""
     parallel: str = ""
     serial: str = ""
-    auto: str = "No"
+    auto: bool = False
     grade_company: str = ""
     grade: str = ""
 
-    # computed
-    sku: str = ""
-    title: str = ""
-    description_html: str = ""
+    # from --price-column, filled by load_inventory_tsv
     price: Optional[float] = None
 
 # ------------------------- template IO -------------------------
@@ -113,57 +135,106 @@ def read_template_header_lines(template_csv: str) -> Tuple[List[str], List[str]]
       line4: blank row (or another info row)
     We preserve first 4 lines exactly, then append our data rows using the column header.
     """
-    lines = Path(template_csv).read_text(encoding="utf-8", errors="replace").splitlines()
+    # only the first 4 lines matter; don't read the rest of a large template
+    with open(template_csv, encoding="utf-8", errors="replace") as f:
+        lines = [line.rstrip("\n") for line in islice(f, 4)]
     if len(lines) < 2:
         raise RuntimeError("Template file seems too short.")
     header_block = lines[:4] if len(lines) >= 4 else lines[:2]
     columns = next(csv.reader([lines[1]]))
     return header_block, columns
 
-def write_bulk_csv(out_csv: str, header_lines: List[str], columns: List[str], rows: List[List[str]]) -> None:
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        for line in header_lines:
-            f.write(line + "\n")
-        w = csv.writer(f)
-        for r in rows:
-            if len(r) < len(columns):
-                r = r + [""] * (len(columns) - len(r))
-            elif len(r) > len(columns):
-                r = r[:len(columns)]
-            w.writerow(r)
+def csv_field(s: str) -> str:
+    # same quoting rule as csv.writer's default dialect (QUOTE_MINIMAL)
+    if "," in s or '"' in s or "\n" in s or "\r" in s:
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
+def encode_csv_row(row: List[str]) -> str:
+    # most template cells are blank; skip the quoting scan for those
+    return ",".join([csv_field(f) if f else f for f in row]) + "\r\n"
+
+def write_bulk_csv(out_csv: str, header_lines: List[str], blocks: Iterable[bytes]) -> None:
+    """
+    Writes the preserved header lines, then each block of already-encoded CSV rows
+    (see render_rows) as it is produced, so only one block is held in memory at a time.
+    Rows go to a sibling .tmp file that replaces out_csv only once every block is written,
+    so a failed run leaves the previous export untouched.
+    """
+    tmp = f"{out_csv}.tmp"
+    try:
+        with open(tmp, "wb", buffering=1 << 20) as f:
+            for line in header_lines:
+                f.write((line + "\n").encode("utf-8"))
+            for block in blocks:
+                f.write(block)
+        os.replace(tmp, out_csv)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
 
 # ------------------------- inventory IO -------------------------
 
-def load_inventory_tsv(path: str) -> Tuple[List[Card], List[str]]:
+# TSV header -> Card field, in Card's positional order.
+_INVENTORY_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("Card Name", "card_name"),
+    ("Player Name", "player"),
+    ("Sport", "sport"),
+    ("Card Number", "card_number"),
+    ("Features", "features"),
+    ("IMAGE URL", "image_url"),
+    ("League", "league"),
+    ("Team ", "team"),          # note: your TSV uses "Team " with a trailing space
+    ("Season", "season"),
+    ("Condition", "condition"),
+    ("Brand", "brand"),
+    ("Card Set", "card_set"),
+)
+
+def iter_tsv_rows(f: Iterable[str]) -> Iterator[List[str]]:
+    """
+    Yields the rows of a TSV opened with newline="". Spreadsheet exports rarely quote
+    anything, so plain lines are just split on tabs; only a line containing a quote goes
+    through csv (which may pull further lines from `f` for a quoted multi-line field).
+    """
+    for line in f:
+        if '"' in line:
+            yield next(csv.reader(chain((line,), f), delimiter="\t"))
+            continue
+        line = line.rstrip("\r\n")
+        yield line.split("\t") if line else []
+
+def load_inventory_tsv(path: str, price_column: Optional[str] = None) -> Tuple[List[Card], List[str]]:
     """
     Returns (cards, raw_fieldnames) so we can optionally use a user-provided price column.
+    If price_column is one of the TSV headers, each card's .price is filled from it in the same pass.
     Expected TSV headers from your file include:
       Card Name, Player Name, Sport, Card Number, Features, IMAGE URL, League, Team , Season, Condition, Brand, Card Set
+    Column positions are resolved once from the header; each row is then a plain list
+    lookup instead of a per-row dict build + 12 keyed .get() calls.
     """
     cards: List[Card] = []
     with open(path, newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f, delimiter="\t")
-        fieldnames = r.fieldnames or []
+        r = iter_tsv_rows(f)
+        fieldnames = next(r, [])
+        pos = {name: i for i, name in enumerate(fieldnames)}
+        idx = [pos.get(name) for name, _ in _INVENTORY_COLUMNS]
+        price_i = pos.get(price_column) if price_column else None
         for row in r:
-            c = Card(
-                card_name=clean(row.get("Card Name", "")),
-                player=clean(row.get("Player Name", "")),
-                sport=clean(row.get("Sport", "")),
-                card_number=clean(row.get("Card Number", "")),
-                features=clean(row.get("Features", "")),
-                image_url=clean(row.get("IMAGE URL", "")),
-                league=clean(row.get("League", "")),
-                team=clean(row.get("Team ", "")),      # note: your TSV uses "Team " with a trailing space
-                season=clean(row.get("Season", "")),
-                condition=clean(row.get("Condition", "")),
-                brand=clean(row.get("Brand", "")),
-                card_set=clean(row.get("Card Set", "")),
-            )
+            if not row:
+                continue
+            n = len(row)
+            c = Card(*[clean(row[i]) if i is not None and i < n else "" for i in idx])
             # infer extras
             c.year = infer_year(c.card_name) or infer_year(c.card_set)
             c.serial = infer_serial(c.features, c.card_name)
             c.auto = infer_auto(c.features, c.card_name)
             c.parallel = clean(c.features)  # you store parallels/insert info in Features
+            if price_i is not None:
+                c.price = safe_float(row[price_i] if price_i < n else "")
             cards.append(c)
     return cards, fieldnames
 
@@ -171,8 +242,9 @@ def load_inventory_tsv(path: str) -> Tuple[List[Card], List[str]]:
 
 def make_sku(i: int, c: Card) -> str:
     # Stable-ish SKU: SOC_0001_player_cardnum
-    num = re.sub(r"[^0-9A-Za-z]+", "", c.card_number or "")
-    return f"SOC_{i:04d}_{slug(c.player)}_{slug(num)}"
+    num = alnum_only(c.card_number)
+    # num is already [0-9A-Za-z]-only, so slug() would only lowercase it
+    return f"SOC_{i:04d}_{slug(c.player)}_{num.lower() or 'x'}"
 
 def make_title(c: Card, mode: str = "A") -> str:
     """
@@ -190,25 +262,26 @@ def make_title(c: Card, mode: str = "A") -> str:
 
     if c.serial:
         parts.append(f"/{c.serial}")
-    if (c.auto or "").lower() == "yes":
+    if c.auto:
         parts.append("AUTO")
 
-    # remove empty + de-dupe exact adjacent duplicates
-    cleaned = []
-    for p in [clean(x) for x in parts if clean(x)]:
-        if cleaned and cleaned[-1] == p:
-            continue
-        cleaned.append(p)
+    # remove empty + de-dupe exact adjacent duplicates (one clean() per part)
+    cleaned: List[str] = []
+    for x in parts:
+        p = clean(x)
+        if p and not (cleaned and cleaned[-1] == p):
+            cleaned.append(p)
 
     # common issue: year duplicated (e.g., year + set includes year). Remove if repeats.
     if len(cleaned) >= 2 and cleaned[0] == cleaned[1]:
         cleaned = cleaned[1:]
 
-    return clean(" ".join(cleaned))[:80]  # keep title under ~80 chars
+    # parts are already whitespace-normalized and non-empty, so the join needs no re-clean
+    return " ".join(cleaned)[:80]  # keep title under ~80 chars
 
 def make_description_html(c: Card) -> str:
     # Short, consistent, safe for eBay HTML
-    auto = "Yes" if (c.auto or "").lower() == "yes" else "No"
+    auto = "Yes" if c.auto else "No"
     serial = f"/{c.serial}" if c.serial else ""
     parallel = c.parallel or ""
     return (
@@ -227,12 +300,61 @@ def make_description_html(c: Card) -> str:
 
 # ------------------------- map into template columns -------------------------
 
+@dataclass
+class TemplateLayout:
+    """Column positions resolved once from the template header, shared by every row."""
+    width: int
+    col_index: Dict[str, int]
+    action_i: Optional[int]
+    price_i: Optional[int]
+    desc_i: Optional[int]
+    # (column index, position in _FIXED_COLUMNS) for each fixed column the template has
+    fixed: Tuple[Tuple[int, int], ...]
+
+# fixed columns + item specifics (your template columns use "C:..."), in the order
+# build_row_for_template lines up their values
+_FIXED_COLUMNS = (
+    "CustomLabel",
+    "*Category",
+    "*Title",
+    "PicURL",
+    "*ConditionID",
+    "C:Player/Athlete",
+    "C:Team",
+    "C:League",
+    "C:Parallel/Variety",
+    "C:Card Number",
+    "C:Autographed",
+    "C:Features",
+    "C:Year Manufactured",
+    "C:Season",
+    "C:Manufacturer",
+    "C:Set",
+    "C:Card Name",
+)
+
+def build_template_layout(columns: List[str]) -> TemplateLayout:
+    col_index = {c: i for i, c in enumerate(columns)}
+
+    # Your template has multiple action columns; in your earlier examples, action is the 2nd "*Action(" column.
+    action_cols = [c for c in columns if c.startswith("*Action(")]
+    action_i = col_index[action_cols[1 if len(action_cols) >= 2 else 0]] if action_cols else None
+
+    # price / description column names vary by template; take the first common one present
+    price_i = next((col_index[c] for c in ("*StartPrice", "StartPrice", "Price", "*Price") if c in col_index), None)
+    desc_i = next((col_index[c] for c in ("*Description", "Description") if c in col_index), None)
+
+    fixed = tuple((col_index[c], k) for k, c in enumerate(_FIXED_COLUMNS) if c in col_index)
+
+    return TemplateLayout(len(columns), col_index, action_i, price_i, desc_i, fixed)
+
 def build_row_for_template(
-    columns: List[str],
+    layout: TemplateLayout,
     *,
+    row: Optional[List[str]] = None,
     action: str,
     sku: str,
-    category: int,
+    category: str,
     title: str,
     picurl: str,
     condition_id: str,
@@ -252,52 +374,23 @@ def build_row_for_template(
     set_short: str,
     card_name: str,
 ) -> List[str]:
-    col_index = {c: i for i, c in enumerate(columns)}
-    row = [""] * len(columns)
-
-    def put(col: str, val: str):
-        if col in col_index:
-            row[col_index[col]] = val
-
-    # Your template has multiple action columns; in your earlier examples, action is the 2nd "*Action(" column.
-    action_cols = [c for c in columns if c.startswith("*Action(")]
-    if len(action_cols) >= 2:
-        row[col_index[action_cols[1]]] = action
-    elif len(action_cols) == 1:
-        row[col_index[action_cols[0]]] = action
-
-    put("CustomLabel", sku)
-    put("*Category", str(category))
-    put("*Title", title)
-    put("PicURL", picurl)
-    put("*ConditionID", condition_id)
-
-    # price column name varies by template; try common ones
-    if price is not None:
-        for price_col in ("*StartPrice", "StartPrice", "Price", "*Price"):
-            if price_col in col_index:
-                row[col_index[price_col]] = f"{price:.2f}"
-                break
-
-    # description column also varies; try common
-    for desc_col in ("*Description", "Description"):
-        if desc_col in col_index:
-            row[col_index[desc_col]] = description_html
-            break
-
-    # item specifics (your template columns use "C:...")
-    put("C:Player/Athlete", player)
-    put("C:Team", team)
-    put("C:League", league)
-    put("C:Parallel/Variety", parallel)
-    put("C:Card Number", card_number)
-    put("C:Autographed", autographed)
-    put("C:Features", features)
-    put("C:Year Manufactured", year)
-    put("C:Season", season)
-    put("C:Manufacturer", manufacturer)
-    put("C:Set", set_short)
-    put("C:Card Name", card_name)
+    # A caller may pass a row from the previous card to reuse: every cell this
+    # function touches is (re)assigned on each call, blank price included.
+    if row is None:
+        row = [""] * layout.width
+
+    if layout.action_i is not None:
+        row[layout.action_i] = action
+    if layout.price_i is not None:
+        row[layout.price_i] = f"{price:.2f}" if price is not None else ""
+    if layout.desc_i is not None:
+        row[layout.desc_i] = description_html
+
+    # same order as _FIXED_COLUMNS
+    values = (sku, category, title, picurl, condition_id, player, team, league, parallel,
+              card_number, autographed, features, year, season, manufacturer, set_short, card_name)
+    for i, k in layout.fixed:
+        row[i] = values[k]
 
     return row
 
@@ -305,9 +398,66 @@ def infer_set_short(card_set: str) -> str:
     # Optional: shorten set name slightly for item specifics
     s = clean(card_set)
     # example: "2024 Topps Finest MLS" -> "Topps Finest MLS"
-    s = re.sub(r"^(19\d{2}|20\d{2})\s+", "", s)
+    s = _lead_year_re.sub("", s)
     return s
 
+# ------------------------- row rendering -------------------------
+
+# Rows are rendered and written CHUNK_SIZE cards at a time.
+CHUNK_SIZE = 1000
+
+@dataclass
+class RowOptions:
+    """Per-run settings every row needs."""
+    layout: TemplateLayout
+    category: str
+    condition_id: str
+    title_mode: str
+    default_price: Optional[float]
+    use_price_col: bool
+    psych_price: bool
+
+def build_card_row(opts: RowOptions, i: int, c: Card, row: Optional[List[str]] = None) -> List[str]:
+    # price: explicit default overrides column
+    price = opts.default_price
+    if price is None and opts.use_price_col:
+        price = c.price
+        if price is not None and opts.psych_price:
+            price = psych_price(price)
+
+    autographed = "Yes" if c.auto else "No"
+    set_short = infer_set_short(c.card_set)
+
+    return build_row_for_template(
+        opts.layout,
+        row=row,
+        action="Add",
+        sku=make_sku(i, c),
+        category=opts.category,
+        title=make_title(c, mode=opts.title_mode),
+        picurl=c.image_url,
+        condition_id=opts.condition_id,
+        description_html=make_description_html(c),
+        price=price,
+        player=c.player,
+        team=c.team,
+        league=c.league,
+        parallel=c.parallel,
+        card_number=c.card_number,
+        autographed=autographed,
+        features=c.features,
+        year=c.year,
+        season=c.season,
+        manufacturer=c.brand,
+        set_short=set_short,
+        card_name=c.card_name,
+    )
+
+def render_rows(opts: RowOptions, start: int, cards: List[Card]) -> bytes:
+    """UTF-8 CSV rows for `cards`, numbered from `start` (the SKU index)."""
+    row = [""] * opts.layout.width  # one buffer, refilled and encoded per card
+    return "".join([encode_csv_row(build_card_row(opts, i, c, row)) for i, c in enumerate(cards, start=start)]).encode("utf-8")
+
 # ------------------------- main -------------------------
 
 def main():
@@ -327,67 +477,40 @@ def main():
     args = ap.parse_args()
 
     header_lines, columns = read_template_header_lines(args.template)
-    cards, inv_cols = load_inventory_tsv(args.inventory)
+    cards, inv_cols = load_inventory_tsv(args.inventory, price_column=args.price_column)
+
+    layout = build_template_layout(columns)
 
     # If user wants price from column, confirm it exists; otherwise silently ignore
     use_price_col = args.price_column if (args.price_column in (inv_cols or [])) else None
 
-    out_rows: List[List[str]] = []
+    # same value on every row: format/intern once so all rows share one string object
+    category = sys.intern(str(args.category))
+    condition_id = sys.intern(args.condition_id)
+
+    # a flat default price is the same for every row: convert it once up front
+    default_price = None
+    if args.default_price is not None:
+        default_price = float(args.default_price)
+        if args.psych_price:
+            default_price = psych_price(default_price)
+
+    opts = RowOptions(
+        layout=layout,
+        category=category,
+        condition_id=condition_id,
+        title_mode=args.title_mode,
+        default_price=default_price,
+        use_price_col=bool(use_price_col),
+        psych_price=args.psych_price,
+    )
 
-    # reload TSV rows again only if we need price col values
-    price_map: Dict[int, Optional[float]] = {}
-    if use_price_col:
-        with open(args.inventory, newline="", encoding="utf-8") as f:
-            r = csv.DictReader(f, delimiter="\t")
-            for idx, row in enumerate(r, start=1):
-                price_map[idx] = safe_float(row.get(use_price_col, ""))
-
-    for i, c in enumerate(cards, start=1):
-        c.sku = make_sku(i, c)
-        c.title = make_title(c, mode=args.title_mode)
-        c.description_html = make_description_html(c)
-
-        # price: explicit default overrides column
-        price = None
-        if args.default_price is not None:
-            price = float(args.default_price)
-        elif use_price_col:
-            price = price_map.get(i)
-
-        if price is not None and args.psych_price:
-            price = psych_price(price)
+    # render lazily one chunk at a time: each block is written before the next is built
+    blocks = (render_rows(opts, k + 1, cards[k:k + CHUNK_SIZE]) for k in range(0, len(cards), CHUNK_SIZE))
+    write_bulk_csv(args.out, header_lines, blocks)
 
-        autographed = "Yes" if (c.auto or "").lower() == "yes" else "No"
-        set_short = infer_set_short(c.card_set)
-
-        row = build_row_for_template(
-            columns,
-            action="Add",
-            sku=c.sku,
-            category=args.category,
-            title=c.title,
-            picurl=c.image_url,
-            condition_id=args.condition_id,
-            description_html=c.description_html,
-            price=price,
-            player=c.player,
-            team=c.team,
-            league=c.league,
-            parallel=c.parallel,
-            card_number=c.card_number,
-            autographed=autographed,
-            features=c.features,
-            year=c.year,
-            season=c.season,
-            manufacturer=c.brand,
-            set_short=set_short,
-            card_name=c.card_name,
-        )
-        out_rows.append(row)
-
-    write_bulk_csv(args.out, header_lines, columns, out_rows)
     print(f"Wrote eBay bulk file: {args.out}")
-    print(f"Rows exported: {len(out_rows)}")
+    print(f"Rows exported: {len(cards)}")
     if use_price_col:
         print(f"Pricing source: TSV column '{use_price_col}'")
     elif args.default_price is not None:
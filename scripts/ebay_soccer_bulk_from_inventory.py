@@ -20,78 +20,98 @@ ENV:
 from __future__ import annotations
 import argparse
 import csv
+import hashlib
 import os
+import random
 import re
+import threading
 import time
-import statistics
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import count
+from io import BytesIO
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlencode
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree
 
 SCRAPINGBEE_ENDPOINT = "https://app.scrapingbee.com/api/v1/"
 
+# Browser fingerprints rotated per request (forwarded to eBay via ScrapingBee's Spb-* headers);
+# eBay tends to serve sparse result pages to the same default client over and over.
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0",
+)
+ACCEPT_LANGUAGES = ("en-US,en;q=0.9", "en-US,en;q=0.8", "en-GB,en;q=0.9,en-US;q=0.8", "en-US")
+
 # -------------------- parsing helpers --------------------
-_money_re = re.compile(r"[\$£€]\s*([\d,]+(?:\.\d{2})?)")
-_range_re = re.compile(r"([\$£€]\s*[\d,]+(?:\.\d{2})?)\s+to\s+([\$£€]\s*[\d,]+(?:\.\d{2})?)", re.I)
+# One pass for parse_money: the low end of the first "$X to $Y" range anywhere in the text (group "lo"),
+# else the first single price (group "p"). The range branch is tried first, across the whole text.
+_money_re = re.compile(
+    r"^(?:.*?[\$£€]\s*(?P<lo>[\d,]+(?:\.\d{2})?)\s+to\s+[\$£€]\s*[\d,]+(?:\.\d{2})?"
+    r"|.*?[\$£€]\s*(?P<p>[\d,]+(?:\.\d{2})?))",
+    re.I | re.S,
+)
+_year_re = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_serial_re = re.compile(r"/\s*(\d{1,4})\b")
+_auto_re = re.compile(r"\b(auto|autograph)\b", re.I)
+_nonalnum_re = re.compile(r"[^a-z0-9]+")
+_non_digits_re = re.compile(r"[^0-9]+")
 
 def clean(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip())
+    # str.split() with no args splits on the same Unicode whitespace as \s+
+    return " ".join((s or "").split())
 
 def parse_money(text: str) -> Optional[float]:
     if not text:
         return None
-    text = clean(text)
-
-    mrange = _range_re.search(text)
-    if mrange:
-        low = mrange.group(1)
-        m = _money_re.search(low)
-        if not m:
-            return None
-        return float(m.group(1).replace(",", ""))
-
-    m = _money_re.search(text)
+    # no clean() first: the pattern already accepts any run of whitespace (\s*, \s+)
+    m = _money_re.match(text)
     if not m:
         return None
-    return float(m.group(1).replace(",", ""))
+    return float((m["lo"] or m["p"]).replace(",", ""))
 
 def robust_median(prices: List[float], take_n: int = 20) -> Optional[float]:
     if not prices:
         return None
-    prices = prices[:take_n]
-    if len(prices) >= 6:
-        sp = sorted(prices)
+    # sort once and read the middle directly (statistics.median would sort again)
+    sp = sorted(prices[:take_n])
+    if len(sp) >= 6:
         k = max(1, int(len(sp) * 0.10))
-        core = sp[k:len(sp)-k] if len(sp) - 2*k >= 3 else sp
-        return statistics.median(core)
-    return statistics.median(prices)
+        if len(sp) - 2*k >= 3:
+            sp = sp[k:len(sp)-k]
+    mid = len(sp) // 2
+    return sp[mid] if len(sp) % 2 else (sp[mid - 1] + sp[mid]) / 2
 
 # -------------------- pricing rules --------------------
+_GRADE_MULT = {"10": 1.15, "9": 1.00, "8": 0.75}
+
 def grade_multiplier(grade_company: str, grade: str) -> float:
     g = (grade or "").strip()
     if not g:
         return 1.0
-    if g == "10":
-        return 1.15
-    if g == "9":
-        return 1.00
-    if g == "8":
-        return 0.75
-    return 0.90
+    return _GRADE_MULT.get(g, 0.90)
 
 def serial_multiplier(serial: str) -> float:
-    try:
-        n = int(re.sub(r"[^0-9]", "", serial or ""))
-        if n <= 10: return 1.30
-        if n <= 25: return 1.18
-        if n <= 50: return 1.10
-        if n <= 99: return 1.05
-    except Exception:
-        pass
+    digits = _non_digits_re.sub("", serial or "")
+    if not digits:
+        return 1.0
+    n = int(digits)
+    if n <= 10: return 1.30
+    if n <= 25: return 1.18
+    if n <= 50: return 1.10
+    if n <= 99: return 1.05
     return 1.0
 
 def psych_price(x: float) -> float:
@@ -100,22 +120,125 @@ def psych_price(x: float) -> float:
     return max(0.99, round(x) - 0.01)
 
 # -------------------- ScrapingBee fetch --------------------
-def scrapingbee_get(url: str, *, render_js: bool=False, premium_proxy: bool=False, wait: int=0) -> str:
-    api_key = os.getenv("SCRAPINGBEE_API_KEY")
-    if not api_key:
-        raise RuntimeError("Missing SCRAPINGBEE_API_KEY env var.")
+def make_session(pool_size: int) -> requests.Session:
+    """
+    One keep-alive connection pool to ScrapingBee for the whole run (no TLS handshake per fetch),
+    with backoff retries on rate-limit / transient 5xx responses. pool_size should be the number
+    of threads making requests: urllib3 discards connections returned to a full pool.
+    """
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  raise_on_status=False)  # final bad response falls through to raise_for_status()
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry))
+    return session
 
-    params = {"api_key": api_key, "url": url}
-    if render_js:
-        params["render_js"] = "true"
-    if premium_proxy:
-        params["premium_proxy"] = "true"
-    if wait and wait > 0:
-        params["wait"] = str(wait)
+@dataclass
+class PageCache:
+    """
+    Fetched pages on disk (one SHA-256-named file per request, reused while younger than ttl seconds),
+    plus in-process de-duplication: concurrent misses for the same request share a single fetch.
+    Expired files are only ever overwritten, never deleted, so the directory keeps growing
+    across runs; clear it by hand (or use a fresh --cache-dir) now and then.
+    """
+    directory: Path
+    ttl: float
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _inflight: Dict[str, Future] = field(default_factory=dict, repr=False)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.html"
+
+    # The cache is only an optimization: any filesystem error reading it is a miss, and a page
+    # that can't be written is simply not cached (it was already fetched and paid for).
+
+    def _read(self, path: Path) -> Optional[str]:
+        try:
+            if time.time() - path.stat().st_mtime < self.ttl:
+                return path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            pass
+        return None
 
-    r = requests.get(SCRAPINGBEE_ENDPOINT, params=params, timeout=60)
-    r.raise_for_status()
-    return r.text
+    def _write(self, path: Path, text: str) -> None:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)  # atomic: readers never see a half-written page
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], str],
+                     keep: Optional[Callable[[str], bool]] = None) -> str:
+        """A fresh page is only written to disk if keep(page) is true (or no keep is given)."""
+        path = self._path(key)
+        text = self._read(path)
+        if text is not None:
+            return text
+
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+        if not owner:
+            return fut.result()  # another thread is already fetching this exact request
+
+        try:
+            text = self._read(path)  # may have landed between the first check and taking ownership
+            if text is None:
+                text = fetch()
+                if keep is None or keep(text):
+                    self._write(path, text)
+            fut.set_result(text)
+            return text
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+@dataclass(frozen=True)
+class ScrapingBeeClient:
+    """API key, connection pool and optional page cache, resolved once in main and shared by all fetches."""
+    api_key: str
+    session: requests.Session
+    cache: Optional[PageCache] = None
+
+    def get(self, url: str, *, render_js: bool=False, premium_proxy: bool=False, wait: int=0,
+            keep: Optional[Callable[[str], bool]] = None) -> Tuple[str, bool]:
+        """Returns (page, fetched): fetched is False when the page came from the cache."""
+        params = {"api_key": self.api_key, "url": url, "forward_headers": "true"}
+        if render_js:
+            params["render_js"] = "true"
+        if premium_proxy:
+            params["premium_proxy"] = "true"
+        if wait and wait > 0:
+            params["wait"] = str(wait)
+
+        fetched = False
+
+        def fetch() -> str:
+            nonlocal fetched
+            fetched = True
+            headers = {
+                "Spb-User-Agent": random.choice(USER_AGENTS),
+                "Spb-Accept-Language": random.choice(ACCEPT_LANGUAGES),
+            }
+            r = self.session.get(SCRAPINGBEE_ENDPOINT, params=params, headers=headers, timeout=60)
+            r.raise_for_status()
+            return r.text
+
+        if self.cache is None:
+            return fetch(), True
+        # everything that changes the page except the key itself
+        cache_key = urlencode(sorted((k, v) for k, v in params.items() if k != "api_key"))
+        text = self.cache.get_or_fetch(cache_key, fetch, keep)
+        return text, fetched
 
 # -------------------- eBay SOLD search --------------------
 def build_ebay_sold_search_url(query: str, category_id: int) -> str:
@@ -128,22 +251,93 @@ def build_ebay_sold_search_url(query: str, category_id: int) -> str:
     }
     return f"{base}?{urlencode(qs)}"
 
-def extract_sold_prices(html: str) -> List[float]:
-    soup = BeautifulSoup(html, "lxml")
+_xml_ws_re = re.compile(r"[ \t\r\n]+")  # what XPath normalize-space() treats as whitespace
+_script_style_tags = frozenset(("script", "style"))
+_no_text_tags = _script_style_tags | {"template"}
+
+def _iter_text(el, skip: frozenset) -> Iterator[str]:
+    if el.text:
+        yield el.text
+    for child in el:
+        # comments / PIs and skipped subtrees contribute only their tail
+        if isinstance(child.tag, str) and child.tag not in skip:
+            yield from _iter_text(child, skip)
+        if child.tail:
+            yield child.tail
+
+def element_text(el) -> str:
+    """
+    Text of el the way BeautifulSoup's get_text(" ", strip=True) reads it: inline JSON or CSS
+    in a nested <script>/<style> is skipped (lxml's itertext() would include it). BeautifulSoup
+    also keeps <template> content apart: only the template element itself returns it.
+    """
+    if el.tag == "template":
+        skip = _script_style_tags
+    elif el.tag not in _script_style_tags and next(el.iterancestors("template"), None) is not None:
+        return ""
+    else:
+        skip = _no_text_tags
+    return " ".join(t for t in (piece.strip() for piece in _iter_text(el, skip)) if t)
 
-    prices: List[float] = []
-    # Common eBay selector
-    for el in soup.select(".s-item__price"):
-        p = parse_money(el.get_text(" ", strip=True))
-        if p is not None:
-            prices.append(p)
+def extract_sold_prices(html: str) -> List[float]:
+    """
+    Streams the page with iterparse instead of keeping the whole DOM: finished subtrees are
+    freed as soon as no open price element still needs their text.
+    Common eBay selector: class token "s-item__price" (CSS .s-item__price); fallback if eBay
+    changes classes: any class containing "price" ([class*='price']), used only when the common
+    selector yields no prices.
+
+    Prices inside nested <script>/<style> are not text (python -m doctest this file):
+    >>> extract_sold_prices('<div class="srp-price-wrap"><script>{"price":"$1,499.00"}</script><span>$12.00</span></div>')
+    [12.0]
+    >>> extract_sold_prices('<div class="s-item__price"><style>a:after{content:"$3.00"}</style>$5.00</div>')
+    [5.0]
+    """
+    # one slot per matching element, reserved at its start tag so results keep document order
+    canonical: List[Optional[float]] = []
+    fallback: List[Optional[float]] = []
+    open_slots: List[Tuple[int, int]] = []  # per open element: (canonical slot, fallback slot); -1 = no match
+    open_matches = 0
+    have_canonical = False
+
+    events = etree.iterparse(BytesIO(html.encode("utf-8")), events=("start", "end"),
+                             html=True, encoding="utf-8", recover=True)
+    try:
+        for event, el in events:
+            if event == "start":
+                cls = el.get("class")
+                slot = fb_slot = -1
+                if cls is not None and "price" in cls:
+                    fb_slot = len(fallback)
+                    fallback.append(None)
+                    open_matches += 1
+                    if "s-item__price" in _xml_ws_re.split(cls):
+                        slot = len(canonical)
+                        canonical.append(None)
+                open_slots.append((slot, fb_slot))
+                continue
+
+            slot, fb_slot = open_slots.pop()
+            if fb_slot >= 0:
+                open_matches -= 1
+                # fallback text only matters until the common selector has produced a price
+                if slot >= 0 or not have_canonical:
+                    p = parse_money(element_text(el))
+                    fallback[fb_slot] = p
+                    if slot >= 0:
+                        canonical[slot] = p
+                        have_canonical = have_canonical or p is not None
+            if not open_matches:
+                # nothing open needs this subtree's text any more (tails included)
+                el.clear()
+                parent = el.getparent()
+                if parent is not None:
+                    while el.getprevious() is not None:
+                        del parent[0]
+    except etree.XMLSyntaxError:  # empty document
+        pass
 
-    # fallback if eBay changes classes
-    if not prices:
-        for el in soup.select("[class*='price']"):
-            p = parse_money(el.get_text(" ", strip=True))
-            if p is not None:
-                prices.append(p)
+    prices = [p for p in (canonical if have_canonical else fallback) if p is not None]
 
     seen = set()
     out = []
@@ -155,7 +349,7 @@ def extract_sold_prices(html: str) -> List[float]:
     return out
 
 # -------------------- inventory model --------------------
-@dataclass
+@dataclass(slots=True)  # no per-instance __dict__; one Card per inventory row
 class Card:
     card_name: str
     player: str
@@ -180,20 +374,20 @@ class Card:
     grade: str = ""
 
 def infer_year(card_name: str) -> str:
-    m = re.search(r"\b(19\d{2}|20\d{2})\b", card_name)
+    m = _year_re.search(card_name)
     return m.group(1) if m else ""
 
 def infer_serial(features: str, card_name: str) -> str:
     # looks for /25, /99 etc
     for s in (features or "", card_name or ""):
-        m = re.search(r"/\s*(\d{1,4})\b", s)
+        m = _serial_re.search(s)
         if m:
             return m.group(1)
     return ""
 
 def infer_auto(features: str, card_name: str) -> str:
     t = (features or "") + " " + (card_name or "")
-    return "Yes" if re.search(r"\b(auto|autograph)\b", t, re.I) else "No"
+    return "Yes" if _auto_re.search(t) else "No"
 
 def infer_parallel(features: str) -> str:
     # treat Features as Parallel/Variety for your template
@@ -201,8 +395,8 @@ def infer_parallel(features: str) -> str:
 
 def make_sku(idx: int, player: str, card_number: str) -> str:
     # stable-ish SKU
-    base = re.sub(r"[^a-z0-9]+", "_", (player or "").strip().lower()).strip("_")
-    num = re.sub(r"[^0-9]+", "", card_number or "")
+    base = _nonalnum_re.sub("_", (player or "").strip().lower()).strip("_")
+    num = _non_digits_re.sub("", card_number or "")
     return f"SOC_{idx:04d}_{base}_{num or 'x'}"
 
 # -------------------- query tiers (exact -> fallback) --------------------
@@ -211,68 +405,52 @@ def build_query_tiers(c: Card) -> List[Tuple[str, str]]:
     Returns list of (tier_name, query_string).
     Tier order goes from strict -> loose.
     """
-    year = c.year or infer_year(c.card_name)
-    set_name = c.card_set or ""
-    player = c.player or ""
-    insert_parallel = c.parallel or infer_parallel(c.features)
-    serial = c.serial or infer_serial(c.features, c.card_name)
-    auto = c.auto or infer_auto(c.features, c.card_name)
-
-    tiers: List[Tuple[str, str]] = []
-
-    # Tier 1: very strict
-    q1_parts = [year, set_name, player, insert_parallel]
-    if serial:
-        q1_parts.append(f"/{serial}")
-    if auto.lower() == "yes":
-        q1_parts.append("auto")
-    # include grading if present
-    if c.grade_company and c.grade:
-        q1_parts += [c.grade_company, c.grade]
-    tiers.append(("exact", clean(" ".join([p for p in q1_parts if p]))))
-
-    # Tier 2: drop grade
-    q2_parts = [year, set_name, player, insert_parallel]
-    if serial:
-        q2_parts.append(f"/{serial}")
-    if auto.lower() == "yes":
-        q2_parts.append("auto")
-    tiers.append(("no_grade", clean(" ".join([p for p in q2_parts if p]))))
-
-    # Tier 3: drop serial
-    q3_parts = [year, set_name, player, insert_parallel]
-    if auto.lower() == "yes":
-        q3_parts.append("auto")
-    tiers.append(("no_serial", clean(" ".join([p for p in q3_parts if p]))))
-
-    # Tier 4: drop parallel/features
-    q4_parts = [year, set_name, player]
-    if auto.lower() == "yes":
-        q4_parts.append("auto")
-    tiers.append(("player_set", clean(" ".join([p for p in q4_parts if p]))))
-
-    # Tier 5: player + set only (last resort)
-    q5_parts = [set_name, player]
-    tiers.append(("loose", clean(" ".join([p for p in q5_parts if p]))))
-
-    # remove empty or duplicates while preserving order
+    # year / parallel / serial / auto were already inferred once per card in iter_inventory_tsv
+    year = c.year
+    set_name = c.card_set
+    player = c.player
+    insert_parallel = c.parallel
+    serial = c.serial
+    auto = c.auto
+
+    # Tiers only ever drop trailing parts, so build them from one shared prefix.
+    base = [p for p in (year, set_name, player) if p]
+    tail_auto = ["auto"] if auto.lower() == "yes" else []
+    with_parallel = base + [insert_parallel] if insert_parallel else base
+    with_serial = with_parallel + [f"/{serial}"] if serial else with_parallel
+    grade = [c.grade_company, c.grade] if c.grade_company and c.grade else []
+
+    tiers: List[Tuple[str, Tuple[str, ...]]] = [
+        ("exact", (*with_serial, *tail_auto, *grade)),  # Tier 1: very strict
+        ("no_grade", (*with_serial, *tail_auto)),       # Tier 2: drop grade
+        ("no_serial", (*with_parallel, *tail_auto)),    # Tier 3: drop serial
+        ("player_set", (*base, *tail_auto)),            # Tier 4: drop parallel/features
+        ("loose", tuple(p for p in (set_name, player) if p)),  # Tier 5: player + set only (last resort)
+    ]
+
+    # remove empty or duplicates while preserving order; only join/clean each distinct tier once
+    seen_parts = set()
     seen = set()
     uniq: List[Tuple[str, str]] = []
-    for name, q in tiers:
+    for name, parts in tiers:
+        if not parts or parts in seen_parts:
+            continue
+        seen_parts.add(parts)
+        q = clean(" ".join(parts))
         if not q or q in seen:
             continue
         seen.add(q)
         uniq.append((name, q))
     return uniq
 
+_STRICT_TIERS = frozenset(("exact", "no_grade"))
+
 def confidence_label(tier: str, comp_count: int) -> str:
+    if comp_count < 3:
+        return "VERY_LOW"
     if tier == "exact" and comp_count >= 6:
         return "HIGH"
-    if tier in ("exact", "no_grade") and comp_count >= 3:
-        return "MED"
-    if comp_count >= 3:
-        return "LOW"
-    return "VERY_LOW"
+    return "MED" if tier in _STRICT_TIERS else "LOW"
 
 # -------------------- eBay template read/write --------------------
 def read_template_header_lines(template_csv: str) -> Tuple[List[str], List[str]]:
@@ -289,22 +467,86 @@ def read_template_header_lines(template_csv: str) -> Tuple[List[str], List[str]]
         raise RuntimeError("Template file is shorter than expected.")
     return lines[:4], next(csv.reader([lines[1]]))
 
-def write_bulk_csv(out_csv: str, header_lines: List[str], columns: List[str], rows: List[List[str]]) -> None:
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        # write preserved header block exactly
-        for line in header_lines:
-            f.write(line + "\n")
-        w = csv.writer(f)
-        for r in rows:
-            # ensure same column count
-            if len(r) < len(columns):
-                r = r + [""] * (len(columns) - len(r))
-            elif len(r) > len(columns):
-                r = r[:len(columns)]
-            w.writerow(r)
+def write_bulk_csv(out_csv: str, header_lines: List[str], columns: List[str], rows: Iterable[List[str]]) -> None:
+    width = len(columns)
+    # stream into a sibling .tmp and only replace out_csv once every row is in:
+    # a failed / interrupted run leaves the previous export untouched
+    tmp = f"{out_csv}.tmp"
+    try:
+        # big buffer: one write() per ~1MB of output instead of per row
+        with open(tmp, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+            # write preserved header block exactly
+            for line in header_lines:
+                f.write(line + "\n")
+            # rows may be a lazy generator (nothing is collected); pad/trim each to the template's column count
+            csv.writer(f).writerows(
+                r if len(r) == width else (r + [""] * (width - len(r)) if len(r) < width else r[:width])
+                for r in rows
+            )
+        os.replace(tmp, out_csv)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
 
 # -------------------- mapping to template columns --------------------
-def build_row_for_template(columns: List[str], *, action: str, sku: str, category: int,
+@dataclass
+class TemplateLayout:
+    """Column positions resolved once from the template header, shared by every row."""
+    width: int
+    col_index: Dict[str, int]
+    action_i: Optional[int]
+    price_i: Optional[int]
+    subtitle_i: Optional[int]
+    details_i: Optional[int]
+    # (column index, position in _FIXED_COLUMNS) for each fixed column the template has
+    fixed: Tuple[Tuple[int, int], ...]
+
+# key columns + item specifics, in the order build_row_for_template lines up their values
+_FIXED_COLUMNS = (
+    "CustomLabel",
+    "*Category",
+    "*Title",
+    "PicURL",
+    "C:Player/Athlete",
+    "C:Team",
+    "C:League",
+    "C:Parallel/Variety",
+    "C:Card Number",
+    "*ConditionID",
+    "C:Autographed",
+    "C:Features",
+    "C:Year Manufactured",
+    "C:Season",
+    "C:Manufacturer",
+    "C:Set",
+    "C:Card Name",
+)
+
+def build_template_layout(columns: List[str]) -> TemplateLayout:
+    col_index = {c: i for i, c in enumerate(columns)}
+
+    # Your template has duplicate *Action columns; the actual "Add" appears in 3rd field in example rows.
+    # We follow your file behavior:
+    # - col0 empty
+    # - col1 CustomLabel
+    # - col2 *Action (Add)
+    # - col3 *Category
+    # Therefore: leave first *Action blank, put SKU in CustomLabel, put action in the second *Action.
+    action_cols = [c for c in columns if c.startswith("*Action(")]
+    action_i = col_index[action_cols[1 if len(action_cols) >= 2 else 0]] if action_cols else None
+
+    # Some templates name the price column "*StartPrice" or "StartPrice" or "Price"; take the first present.
+    price_i = next((col_index[c] for c in ("*StartPrice", "StartPrice", "Price", "*Price") if c in col_index), None)
+
+    fixed = tuple((col_index[c], k) for k, c in enumerate(_FIXED_COLUMNS) if c in col_index)
+
+    return TemplateLayout(len(columns), col_index, action_i, price_i,
+                          col_index.get("Subtitle"), col_index.get("AdditionalDetails"), fixed)
+
+def build_row_for_template(layout: TemplateLayout, *, action: str, sku: str, category: int,
                            title: str, picurl: str, player: str, team: str, league: str,
                            parallel: str, card_number: str, condition_id: str,
                            autographed: str, features: str, year: str, season: str,
@@ -315,94 +557,67 @@ def build_row_for_template(columns: List[str], *, action: str, sku: str, categor
     We fill the key columns from your template header.
     Everything else stays blank.
     """
-    col_index = {c: i for i, c in enumerate(columns)}
-    row = [""] * len(columns)
-
-    def put(col: str, val: str):
-        if col in col_index:
-            row[col_index[col]] = val
+    row = [""] * layout.width
 
-    # Your template has duplicate *Action columns; the actual "Add" appears in 3rd field in example rows.
-    # We follow your file behavior:
-    # - col0 empty
-    # - col1 CustomLabel
-    # - col2 *Action (Add)
-    # - col3 *Category
-    # Therefore: leave first *Action blank, put SKU in CustomLabel, put action in the second *Action.
-    put("CustomLabel", sku)
+    if layout.action_i is not None:
+        row[layout.action_i] = action
 
-    # Find the SECOND "*Action(...)" column by scanning prefix match
-    action_cols = [c for c in columns if c.startswith("*Action(")]
-    if len(action_cols) >= 2:
-        row[col_index[action_cols[1]]] = action
-    elif len(action_cols) == 1:
-        row[col_index[action_cols[0]]] = action
-
-    put("*Category", str(category))
-    put("*Title", title)
-    put("PicURL", picurl)
-
-    put("C:Player/Athlete", player)
-    put("C:Team", team)
-    put("C:League", league)
-    put("C:Parallel/Variety", parallel)
-    put("C:Card Number", card_number)
-
-    put("*ConditionID", condition_id)
-    put("C:Autographed", autographed)
-    put("C:Features", features)
-    put("C:Year Manufactured", year)
-    put("C:Season", season)
-    put("C:Manufacturer", manufacturer)
-    put("C:Set", set_short)
-    put("C:Card Name", card_name)
+    # same order as _FIXED_COLUMNS
+    values = (sku, str(category), title, picurl, player, team, league, parallel, card_number,
+              condition_id, autographed, features, year, season, manufacturer, set_short, card_name)
+    for i, k in layout.fixed:
+        row[i] = values[k]
 
     # If your template includes a price column, try to fill it.
-    # Some templates name it "*StartPrice" or "StartPrice" or "Price".
-    for price_col in ("*StartPrice", "StartPrice", "Price", "*Price"):
-        if price_col in col_index and suggested_price:
-            row[col_index[price_col]] = f"{suggested_price:.2f}"
-            break
+    if layout.price_i is not None and suggested_price:
+        row[layout.price_i] = f"{suggested_price:.2f}"
 
     # Optional: drop diagnostics into unused “Subtitle” if present
-    if "Subtitle" in col_index:
+    if layout.subtitle_i is not None:
         diag = f"comps:{comp_count} med:{(round(comp_median,2) if comp_median is not None else 'na')} tier:{comp_tier} conf:{comp_conf}"
-        row[col_index["Subtitle"]] = diag[:80]
+        row[layout.subtitle_i] = diag[:80]
 
     # Optional: if “AdditionalDetails” exists, include query URL
-    if "AdditionalDetails" in col_index:
-        row[col_index["AdditionalDetails"]] = query_url[:500]
+    if layout.details_i is not None:
+        row[layout.details_i] = query_url[:500]
 
     return row
 
 # -------------------- main flow --------------------
-def load_inventory_tsv(path: str) -> List[Card]:
-    cards: List[Card] = []
+# TSV header -> Card field, in Card's field order
+_INVENTORY_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("Card Name", "card_name"),
+    ("Player Name", "player"),
+    ("Sport", "sport"),
+    ("Card Number", "card_number"),
+    ("Features", "features"),
+    ("IMAGE URL", "image_url"),
+    ("League", "league"),
+    ("Team ", "team"),          # note: your TSV uses "Team " with a trailing space
+    ("Season", "season"),
+    ("Condition", "condition"),
+    ("Brand", "brand"),
+    ("Card Set", "card_set"),
+)
+
+def iter_inventory_tsv(path: str) -> Iterator[Card]:
     with open(path, newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f, delimiter="\t")
+        r = csv.reader(f, delimiter="\t")
+        # resolve column positions once; each row is then plain list indexing (no per-row dict)
+        pos = {name: i for i, name in enumerate(next(r, []))}
+        idx = [pos.get(name) for name, _ in _INVENTORY_COLUMNS]
         for row in r:
-            c = Card(
-                card_name=clean(row.get("Card Name", "")),
-                player=clean(row.get("Player Name", "")),
-                sport=clean(row.get("Sport", "")),
-                card_number=clean(row.get("Card Number", "")),
-                features=clean(row.get("Features", "")),
-                image_url=clean(row.get("IMAGE URL", "")),
-                league=clean(row.get("League", "")),
-                team=clean(row.get("Team ", "")),
-                season=clean(row.get("Season", "")),
-                condition=clean(row.get("Condition", "")),
-                brand=clean(row.get("Brand", "")),
-                card_set=clean(row.get("Card Set", "")),
-            )
+            if not row:
+                continue
+            n = len(row)
+            c = Card(*[clean(row[i]) if i is not None and i < n else "" for i in idx])
             c.year = infer_year(c.card_name)
             c.parallel = infer_parallel(c.features)
             c.serial = infer_serial(c.features, c.card_name)
             c.auto = infer_auto(c.features, c.card_name)
             # template uses "Topps Finest" (short) in sample; try to infer a shorter set label
             c.set_short = "Topps Finest" if "Finest" in c.card_set else clean(c.card_set)
-            cards.append(c)
-    return cards
+            yield c
 
 def make_title(c: Card) -> str:
     parts = [c.year, c.card_set, c.card_number, c.player, c.parallel]
@@ -412,19 +627,37 @@ def make_title(c: Card) -> str:
         parts.append("AUTO")
     return clean(" ".join([p for p in parts if p]))
 
-def fetch_best_comps_for_card(c: Card, *, category_id: int, min_comps: int,
-                             render_js: bool, premium_proxy: bool, wait: int,
-                             take_n: int) -> Tuple[str, str, int, Optional[float], Optional[float], str]:
+def fetch_best_comps_for_card(c: Card, client: ScrapingBeeClient, *, category_id: int, min_comps: int,
+                             render_js: bool, premium_proxy: bool, wait: int, take_n: int,
+                             tier_pool: Optional[Executor] = None) -> Tuple[str, str, int, Optional[float], Optional[float], str, int]:
     """
     Returns:
-      (tier_name, confidence, comp_count, comp_median, suggested_price, query_url)
+      (tier_name, confidence, comp_count, comp_median, suggested_price, query_url, fetches)
+    where fetches is how many pages actually came from ScrapingBee (cache hits don't count).
+
+    Tiers are fetched lazily strict -> loose and stop at the first one with enough comps.
+    With a tier_pool, every tier is requested up front in parallel (latency = slowest tier
+    instead of the sum, at the cost of credits for tiers that turn out unneeded); the same
+    strict -> loose selection is then applied to the results.
     """
     tiers = build_query_tiers(c)
+    urls = [build_ebay_sold_search_url(q, category_id=category_id) for _, q in tiers]
+    # don't cache a page without prices: eBay sometimes serves sparse/blocked results, and a
+    # cached one would pin this tier at zero comps until the TTL runs out
+    get = partial(client.get, render_js=render_js, premium_proxy=premium_proxy, wait=wait,
+                  keep=lambda html: bool(extract_sold_prices(html)))
+    fetched_urls: List[str] = []  # list.append is thread-safe, so tier_pool threads can record too
+
+    def fetch(url: str) -> str:
+        html, fetched = get(url)
+        if fetched:
+            fetched_urls.append(url)
+        return html
+
+    pages = tier_pool.map(fetch, urls) if tier_pool is not None else map(fetch, urls)
 
     best = None  # (tier, count, median, url)
-    for tier_name, q in tiers:
-        url = build_ebay_sold_search_url(q, category_id=category_id)
-        html = scrapingbee_get(url, render_js=render_js, premium_proxy=premium_proxy, wait=wait)
+    for (tier_name, _), url, html in zip(tiers, urls, pages):
         prices = extract_sold_prices(html)
         med = robust_median(prices, take_n=take_n)
 
@@ -446,11 +679,21 @@ def fetch_best_comps_for_card(c: Card, *, category_id: int, min_comps: int,
     conf = confidence_label(tier_name, count)
 
     if med is None:
-        return tier_name, conf, count, None, None, url
+        return tier_name, conf, count, None, None, url, len(fetched_urls)
 
     suggested = med * grade_multiplier(c.grade_company, c.grade) * serial_multiplier(c.serial)
     suggested = psych_price(suggested)
-    return tier_name, conf, count, med, suggested, url
+    return tier_name, conf, count, med, suggested, url, len(fetched_urls)
+
+def imap_bounded(pool: Executor, fn: Callable[..., Any], *iterables: Iterable[Any], window: int) -> Iterator[Any]:
+    """Ordered pool.map that reads at most `window` inputs ahead (pool.map drains its inputs up front)."""
+    pending: Deque[Future] = deque()
+    for args in zip(*iterables):
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 def main():
     ap = argparse.ArgumentParser()
@@ -460,35 +703,48 @@ def main():
     ap.add_argument("--category", type=int, default=47140, help="Soccer trading cards category")
     ap.add_argument("--min-comps", type=int, default=5)
     ap.add_argument("--take-n", type=int, default=20)
-    ap.add_argument("--sleep", type=float, default=1.4)
+    ap.add_argument("--sleep", type=float, default=1.4, help="Pause after each card, per worker")
+    ap.add_argument("--concurrency", type=int, default=5, help="Cards scraped in parallel (keep within your ScrapingBee plan's concurrency limit)")
     ap.add_argument("--render-js", action="store_true")
     ap.add_argument("--premium-proxy", action="store_true")
     ap.add_argument("--wait", type=int, default=0)
+    ap.add_argument("--parallel-tiers", action="store_true",
+                    help="Request all query tiers of a card at once (faster, but spends credits on tiers a sequential walk would skip)")
+    ap.add_argument("--cache-dir", default=".scrape_cache", help="Where fetched result pages are kept for reuse (never pruned; delete it to reclaim space)")
+    ap.add_argument("--cache-ttl-hours", type=float, default=24.0, help="Re-fetch cached pages older than this")
+    ap.add_argument("--no-cache", action="store_true", help="Always fetch from ScrapingBee; don't read or write the cache")
     ap.add_argument("--condition-id", default="4000", help="Template sample uses 4000; keep consistent unless you change it")
     args = ap.parse_args()
 
     header_lines, columns = read_template_header_lines(args.template)
-    cards = load_inventory_tsv(args.inventory)
-
-    out_rows: List[List[str]] = []
+    layout = build_template_layout(columns)
+    cards = iter_inventory_tsv(args.inventory)
+    api_key = os.getenv("SCRAPINGBEE_API_KEY")
+    if not api_key:
+        raise RuntimeError("Missing SCRAPINGBEE_API_KEY env var.")
+    cache = None if args.no_cache else PageCache(Path(args.cache_dir), ttl=args.cache_ttl_hours * 3600)
+    # HTTP calls run on at most --concurrency threads (card workers, or tier_pool with --parallel-tiers)
+    client = ScrapingBeeClient(api_key, make_session(max(1, args.concurrency)), cache=cache)
 
-    for i, c in enumerate(cards, start=1):
+    def process_card(i: int, c: Card) -> Tuple[List[str], str]:
         sku = make_sku(i, c.player, c.card_number)
         title = make_title(c)
         picurl = c.image_url
 
-        tier, conf, comp_count, comp_median, suggested, query_url = fetch_best_comps_for_card(
+        tier, conf, comp_count, comp_median, suggested, query_url, fetches = fetch_best_comps_for_card(
             c,
+            client,
             category_id=args.category,
             min_comps=args.min_comps,
             render_js=args.render_js,
             premium_proxy=args.premium_proxy,
             wait=args.wait,
             take_n=args.take_n,
+            tier_pool=tier_pool,
         )
 
         row = build_row_for_template(
-            columns,
+            layout,
             action="Add",
             sku=sku,
             category=args.category,
@@ -514,12 +770,34 @@ def main():
             comp_median=comp_median,
             query_url=query_url,
         )
-        out_rows.append(row)
-
-        print(f"[{i}/{len(cards)}] {sku} comps={comp_count} tier={tier} conf={conf} med={comp_median} -> {suggested} | {c.player}")
-        time.sleep(args.sleep)
+        # pace each worker's calls (±50% jitter so workers don't fire in lockstep);
+        # a card answered entirely from the cache made no calls, so it doesn't wait
+        if fetches:
+            time.sleep(args.sleep * random.uniform(0.5, 1.5))
+        return row, f"[{i}] {sku} comps={comp_count} tier={tier} conf={conf} med={comp_median} -> {suggested} | {c.player}"
+
+    def iter_rows(pool: Executor) -> Iterator[List[str]]:
+        for row, progress in imap_bounded(pool, process_card, count(1), cards, window=2 * max(1, args.concurrency)):
+            print(progress)
+            yield row
+
+    # Scraping is network-bound: keep up to --concurrency cards in flight.
+    # Results come back in inventory order, so output rows and progress lines stay ordered.
+    # Inventory is read and rows are written as they go, so memory stays flat for big files.
+    # With --parallel-tiers the HTTP calls themselves run on tier_pool, also capped at --concurrency.
+    tier_pool = ThreadPoolExecutor(max_workers=max(1, args.concurrency)) if args.parallel_tiers else None
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        try:
+            write_bulk_csv(args.out, header_lines, columns, iter_rows(pool))
+        except BaseException:
+            # don't keep spending API credits on queued cards after a failure / Ctrl-C
+            pool.shutdown(wait=False, cancel_futures=True)
+            if tier_pool is not None:
+                tier_pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    if tier_pool is not None:
+        tier_pool.shutdown()
 
-    write_bulk_csv(args.out, header_lines, columns, out_rows)
     print(f"\nWrote eBay bulk file: {args.out}")
 
 if __name__ == "__main__":